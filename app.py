@@ -2,8 +2,27 @@
 Streamlit application for PDF Question Answering System.
 """
 
+import hashlib
+
 import streamlit as st
-from src.rag_app import RAGSystem
+from src.rag_app import RAGSystem, Config
+from src.rag_app.models import LLMModel
+from src.rag_app.warmup import TrafficMonitor
+from src.rag_app.worker_pool import InferenceWorkerPool
+
+
+@st.cache_resource
+def load_shared_models():
+    """Load the LLM, worker pool and traffic monitor once per server process.
+
+    The pool registers its own shutdown to run at interpreter exit.
+    """
+    config = Config.from_env()
+    llm_model = LLMModel(config)
+    inference_pool = None
+    if config.num_workers > 0:
+        inference_pool = InferenceWorkerPool(llm_model, config)
+    return config, llm_model, inference_pool, TrafficMonitor()
 
 
 def main():
@@ -16,11 +35,20 @@ def main():
 
     # Initialize session state
     if 'rag_system' not in st.session_state:
-        st.session_state.rag_system = RAGSystem()
+        # Sessions keep their own index but share one copy of the model weights
+        config, llm_model, inference_pool, traffic_monitor = load_shared_models()
+        st.session_state.rag_system = RAGSystem(
+            config,
+            llm_model=llm_model,
+            inference_pool=inference_pool,
+            traffic_monitor=traffic_monitor
+        )
     if "query_engine" not in st.session_state:
         st.session_state.query_engine = None
     if "pdf_processed" not in st.session_state:
         st.session_state.pdf_processed = False
+    if "processed_file_key" not in st.session_state:
+        st.session_state.processed_file_key = None
 
     # Main Title
     st.title("PDF Question Answering System")
@@ -29,15 +57,17 @@ def main():
     st.sidebar.header("Upload PDF")
     uploaded_file = st.sidebar.file_uploader("Choose a PDF file", type="pdf")
 
-    # Process PDF when uploaded
-    if uploaded_file is not None:
-        file_content = uploaded_file.read()
+    # Process PDF when a new file is uploaded; reruns keep the existing index
+    file_content = uploaded_file.getvalue() if uploaded_file is not None else None
+    file_key = hashlib.sha256(file_content).hexdigest() if file_content else None
+    if file_key and file_key != st.session_state.processed_file_key:
         with st.spinner("Processing PDF...This might take a minute"):
             try:
                 success = st.session_state.rag_system.process_pdf(file_content)
                 if success:
                     st.session_state.query_engine = st.session_state.rag_system.get_query_engine()
                     st.session_state.pdf_processed = True
+                    st.session_state.processed_file_key = file_key
                     st.sidebar.success("PDF processed successfully")
                 else:
                     st.sidebar.error("Error Processing PDF!")
@@ -0,0 +1,241 @@
+"""
+Two-stage retrieval over compressed embedding vectors.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+
+class CompressedVectorRetriever(BaseRetriever):
+    """
+    Retriever that scans compressed vectors first and reranks exactly.
+
+    The first pass scores every chunk against a PCA-truncated and/or int8
+    scalar-quantized copy of the embeddings to pick ``candidate_top_k``
+    candidates. The second pass rescores only those candidates with the
+    full-precision vectors and returns the best ``similarity_top_k``.
+    """
+
+    # Rows of int8 codes dequantized per block; small enough that the float32
+    # copy stays in cache, so main-memory traffic is the int8 codes only
+    SCAN_BLOCK_ROWS = 1024
+
+    def __init__(
+        self,
+        index: VectorStoreIndex,
+        similarity_top_k: int,
+        candidate_top_k: int,
+        compressed_dims: Optional[int] = None,
+        quantize_int8: bool = True,
+    ):
+        """
+        Initialize the retriever and build the compressed vectors.
+
+        Args:
+            index: VectorStoreIndex backed by an in-memory vector store
+            similarity_top_k: Number of nodes returned after reranking
+            candidate_top_k: Number of candidates kept from the compressed scan
+            compressed_dims: PCA dimensions to keep. None or 0 keeps all.
+            quantize_int8: Whether to scalar-quantize the compressed vectors
+
+        Raises:
+            ValueError: If the index has no embeddings to compress
+        """
+        super().__init__()
+        self.index = index
+        self.similarity_top_k = similarity_top_k
+        self.candidate_top_k = max(candidate_top_k, similarity_top_k)
+        self.quantize_int8 = quantize_int8
+
+        embedding_dict = self._get_embedding_dict(index)
+        if not embedding_dict:
+            raise ValueError("Index has no embeddings to compress")
+
+        self.node_ids = list(embedding_dict.keys())
+        self.full_vectors = self._normalize(
+            np.asarray([embedding_dict[i] for i in self.node_ids], dtype=np.float32)
+        )
+        self._build_compressed(compressed_dims)
+
+    @staticmethod
+    def _get_embedding_dict(index: VectorStoreIndex) -> Dict[str, List[float]]:
+        """Read the raw node embeddings from the index's vector store."""
+        data = getattr(index.vector_store, "data", None)
+        if data is None or not hasattr(data, "embedding_dict"):
+            raise ValueError(
+                "Two-stage retrieval requires an in-memory SimpleVectorStore"
+            )
+        return data.embedding_dict
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize vectors so dot products equal cosine similarity."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _build_compressed(self, compressed_dims: Optional[int]):
+        """Fit the PCA projection and int8 scales, then encode all vectors."""
+        full_dim = self.full_vectors.shape[1]
+
+        # PCA truncation; the number of components is bounded by the corpus size
+        if compressed_dims and compressed_dims < full_dim:
+            centred = self.full_vectors - self.full_vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(centred, full_matrices=False)
+            self.projection = vt[:compressed_dims].T.astype(np.float32)
+            reduced = centred @ self.projection
+        else:
+            self.projection = None
+            reduced = self.full_vectors
+
+        # Symmetric per-dimension int8 scalar quantization
+        if self.quantize_int8:
+            self.scales = np.maximum(np.abs(reduced).max(axis=0), 1e-12) / 127.0
+            self.compressed_vectors = np.clip(
+                np.round(reduced / self.scales), -127, 127
+            ).astype(np.int8)
+        else:
+            self.scales = None
+            self.compressed_vectors = np.ascontiguousarray(reduced, dtype=np.float32)
+
+    def _embed_query(self, query_bundle: QueryBundle) -> np.ndarray:
+        """Return the normalized full-precision query embedding."""
+        if query_bundle.embedding is None:
+            query_bundle.embedding = Settings.embed_model.get_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+        return self._normalize(np.asarray(query_bundle.embedding, dtype=np.float32))
+
+    def _compressed_scores(self, query: np.ndarray) -> np.ndarray:
+        """Score every vector against the query using the compressed copy."""
+        if self.projection is not None:
+            # x.q = (x - m).q + m.q and m.q is the same for every chunk, so the
+            # raw query ranks the centred vectors exactly as cosine does
+            query = query @ self.projection
+        query = query.astype(np.float32)
+        if self.scales is None:
+            return self.compressed_vectors @ query
+
+        # Fold the per-dimension scales into the query instead of dequantizing.
+        # A plain int8 @ float32 matmul would cast the whole matrix to a new
+        # float32 array each query, reading more memory than a full scan.
+        query = query * self.scales.astype(np.float32)
+        num_vectors = len(self.compressed_vectors)
+        scores = np.empty(num_vectors, dtype=np.float32)
+        block = np.empty(
+            (min(self.SCAN_BLOCK_ROWS, num_vectors), self.compressed_vectors.shape[1]),
+            dtype=np.float32,
+        )
+        for start in range(0, num_vectors, self.SCAN_BLOCK_ROWS):
+            codes = self.compressed_vectors[start:start + self.SCAN_BLOCK_ROWS]
+            rows = block[:len(codes)]
+            np.copyto(rows, codes, casting="unsafe")
+            np.dot(rows, query, out=scores[start:start + len(codes)])
+        return scores
+
+    @staticmethod
+    def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """Return indices of the k highest scores, best first."""
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _search(self, query: np.ndarray) -> List[tuple]:
+        """Run the two-stage search and return (row, score) pairs."""
+        candidates = self._top_indices(
+            self._compressed_scores(query), self.candidate_top_k
+        )
+        exact_scores = self.full_vectors[candidates] @ query
+        order = np.argsort(-exact_scores)[:self.similarity_top_k]
+        return [(int(candidates[i]), float(exact_scores[i])) for i in order]
+
+    def with_top_k(self, similarity_top_k: int) -> "CompressedVectorRetriever":
+        """
+        Return a retriever sharing the compressed vectors with a new top_k.
+
+        Args:
+            similarity_top_k: Number of nodes returned after reranking
+
+        Returns:
+            CompressedVectorRetriever instance
+        """
+        retriever = copy.copy(self)
+        retriever.similarity_top_k = similarity_top_k
+        retriever.candidate_top_k = max(self.candidate_top_k, similarity_top_k)
+        return retriever
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """Retrieve nodes for a query with compressed scan plus exact rerank."""
+        query = self._embed_query(query_bundle)
+        results = self._search(query)
+        nodes = self.index.docstore.get_nodes(
+            [self.node_ids[row] for row, _ in results]
+        )
+        return [
+            NodeWithScore(node=node, score=score)
+            for node, (_, score) in zip(nodes, results)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the memory bandwidth of one query compared to a full scan.
+
+        The compressed scan reads each code once from memory; int8 blocks are
+        widened to float32 only in a cache-sized buffer.
+
+        Returns:
+            Dictionary with scan sizes in bytes and the fraction saved
+        """
+        num_vectors, full_dim = self.full_vectors.shape
+        full_scan_bytes = self.full_vectors.nbytes
+        compressed_scan_bytes = self.compressed_vectors.nbytes
+        num_candidates = min(self.candidate_top_k, num_vectors)
+        rerank_bytes = num_candidates * full_dim * self.full_vectors.itemsize
+        two_stage_bytes = compressed_scan_bytes + rerank_bytes
+
+        return {
+            "num_vectors": num_vectors,
+            "full_dim": full_dim,
+            "compressed_dim": self.compressed_vectors.shape[1],
+            "compressed_dtype": str(self.compressed_vectors.dtype),
+            "full_scan_bytes": full_scan_bytes,
+            "compressed_scan_bytes": compressed_scan_bytes,
+            "rerank_bytes": rerank_bytes,
+            "bandwidth_saved": 1.0 - two_stage_bytes / full_scan_bytes,
+        }
+
+    def evaluate_recall(self, queries: List[str], k: Optional[int] = None) -> float:
+        """
+        Measure recall@k of two-stage search against full-precision search.
+
+        Args:
+            queries: Query strings to evaluate
+            k: Cutoff to evaluate (defaults to similarity_top_k)
+
+        Returns:
+            Mean fraction of the exact top-k found by two-stage search
+        """
+        k = k or self.similarity_top_k
+        if not queries:
+            raise ValueError("Cannot evaluate recall without queries")
+
+        original_top_k = self.similarity_top_k
+        original_candidate_top_k = self.candidate_top_k
+        self.similarity_top_k = k
+        self.candidate_top_k = max(original_candidate_top_k, k)
+        try:
+            recalls = []
+            for query_str in queries:
+                query = self._embed_query(QueryBundle(query_str=query_str))
+                exact = set(self._top_indices(self.full_vectors @ query, k).tolist())
+                approx = {row for row, _ in self._search(query)}
+                recalls.append(len(exact & approx) / len(exact))
+        finally:
+            self.similarity_top_k = original_top_k
+            self.candidate_top_k = original_candidate_top_k
+
+        return float(np.mean(recalls))
@@ -28,6 +28,19 @@ class Config:
     similarity_top_k: int = 2
     similarity_cutoff: float = 0.5
     
+    # Two-stage retrieval configuration ("full" or "two_stage")
+    retrieval_mode: str = "full"
+    candidate_top_k: int = 20
+    compressed_dims: Optional[int] = 128  # None or 0 keeps all dimensions
+    quantize_int8: bool = True
+    
+    # Answer warm-up configuration
+    warmup_enabled: bool = False
+    warmup_max_questions: int = 20
+    warmup_time_budget: float = 300.0  # Wall-clock seconds
+    warmup_cpu_budget: float = 120.0  # CPU seconds
+    warmup_match_threshold: float = 0.95  # Query embedding cosine similarity
+    
     # Generation configuration
     max_new_tokens: int = 512
     num_return_sequences: int = 1
@@ -39,6 +52,20 @@ class Config:
     # Device configuration
     device_map: Optional[str] = None  # Set to 'cuda:0' for GPU
     
+    # Inference worker pool configuration (0 workers generates in-process)
+    num_workers: int = 0
+    worker_threads: Optional[int] = None  # Defaults to cpu_count // num_workers
+    worker_start_method: str = "spawn"  # Or "forkserver"; forking a threaded server is unsafe
+    generation_timeout: float = 300.0  # Seconds to wait for a worker's answer
+    
+    def __post_init__(self):
+        """Validate settings that would otherwise fail silently."""
+        if self.retrieval_mode not in ("full", "two_stage"):
+            raise ValueError(
+                f"Invalid retrieval_mode '{self.retrieval_mode}'. "
+                "Expected 'full' or 'two_stage'."
+            )
+    
     @classmethod
     def from_env(cls) -> 'Config':
         """Create Config instance from environment variables."""
@@ -57,6 +84,15 @@ class Config:
             chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "15")),
             similarity_top_k=int(os.getenv("SIMILARITY_TOP_K", "2")),
             similarity_cutoff=float(os.getenv("SIMILARITY_CUTOFF", "0.5")),
+            retrieval_mode=os.getenv("RETRIEVAL_MODE", "full"),
+            candidate_top_k=int(os.getenv("CANDIDATE_TOP_K", "20")),
+            compressed_dims=int(os.getenv("COMPRESSED_DIMS", "128")),
+            quantize_int8=os.getenv("QUANTIZE_INT8", "True").lower() == "true",
+            warmup_enabled=os.getenv("WARMUP_ENABLED", "False").lower() == "true",
+            warmup_max_questions=int(os.getenv("WARMUP_MAX_QUESTIONS", "20")),
+            warmup_time_budget=float(os.getenv("WARMUP_TIME_BUDGET", "300")),
+            warmup_cpu_budget=float(os.getenv("WARMUP_CPU_BUDGET", "120")),
+            warmup_match_threshold=float(os.getenv("WARMUP_MATCH_THRESHOLD", "0.95")),
             max_new_tokens=int(os.getenv("MAX_NEW_TOKENS", "512")),
             num_return_sequences=int(os.getenv("NUM_RETURN_SEQUENCES", "1")),
             temperature=float(os.getenv("TEMPERATURE", "0.3")),
@@ -64,4 +100,8 @@ class Config:
             do_sample=os.getenv("DO_SAMPLE", "True").lower() == "true",
             repetition_penalty=float(os.getenv("REPETITION_PENALTY", "1.2")),
             device_map=os.getenv("DEVICE_MAP", None),
+            num_workers=int(os.getenv("NUM_WORKERS", "0")),
+            worker_threads=int(os.getenv("WORKER_THREADS", "0")) or None,
+            worker_start_method=os.getenv("WORKER_START_METHOD", "spawn"),
+            generation_timeout=float(os.getenv("GENERATION_TIMEOUT", "300")),
         )
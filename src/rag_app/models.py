@@ -2,11 +2,52 @@
 LLM model management module.
 """
 
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from typing import Optional
+import torch
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
+from typing import Callable, Optional
 from .config import Config
 
 
+class GenerationAborted(Exception):
+    """Raised when a generation is stopped early by its abort check."""
+    
+    def __init__(self, message: str = "Generation aborted", cpu_time: float = 0.0):
+        """
+        Initialize the exception.
+        
+        Args:
+            message: Error message
+            cpu_time: CPU seconds a worker process spent before stopping
+        """
+        super().__init__(message)
+        self.cpu_time = cpu_time
+
+
+class AbortCriteria(StoppingCriteria):
+    """Stops generation after the current token once an abort check returns True."""
+    
+    def __init__(self, should_abort: Callable[[], bool]):
+        """
+        Initialize the stopping criteria.
+        
+        Args:
+            should_abort: Called after every generated token
+        """
+        self.should_abort = should_abort
+        self.triggered = False
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        self.triggered = self.triggered or bool(self.should_abort())
+        return torch.full(
+            (input_ids.shape[0],), self.triggered, dtype=torch.bool, device=input_ids.device
+        )
+
+
 class LLMModel:
     """Manages LLM model loading and text generation."""
     
@@ -45,15 +86,24 @@ class LLMModel:
             use_fast=True
         )
     
-    def generate(self, prompt: str) -> str:
+    def generate(
+        self,
+        prompt: str,
+        should_abort: Optional[Callable[[], bool]] = None
+    ) -> str:
         """
         Generate text from a prompt.
         
         Args:
             prompt: Input prompt text
+            should_abort: Optional check, called after every token, that stops
+                generation when it returns True
             
         Returns:
             Generated text response
+            
+        Raises:
+            GenerationAborted: If should_abort stopped the generation
         """
         # Tokenize input
         inputs = self.tokenizer(
@@ -62,6 +112,8 @@ class LLMModel:
             padding=True
         )
         
+        abort_criteria = AbortCriteria(should_abort) if should_abort else None
+        
         # Generate
         outputs = self.model.generate(
             input_ids=inputs['input_ids'],
@@ -70,9 +122,13 @@ class LLMModel:
             temperature=self.config.temperature,
             top_p=self.config.top_p,
             do_sample=self.config.do_sample,
-            repetition_penalty=self.config.repetition_penalty
+            repetition_penalty=self.config.repetition_penalty,
+            stopping_criteria=StoppingCriteriaList([abort_criteria]) if abort_criteria else None
         )
         
+        if abort_criteria and abort_criteria.triggered:
+            raise GenerationAborted("Generation aborted")
+        
         # Decode response
         response_text = self.tokenizer.decode(
             outputs[0], 
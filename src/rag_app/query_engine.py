@@ -7,8 +7,9 @@ from llama_index.core.retrievers import VectorIndexRetriever
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.postprocessor import SimilarityPostprocessor
 from llama_index.core import Document
-from typing import List
+from typing import Any, Dict, List, Optional
 from .config import Config
+from .compressed_retrieval import CompressedVectorRetriever
 
 
 class QueryEngineBuilder:
@@ -23,6 +24,7 @@ class QueryEngineBuilder:
         """
         self.config = config
         self.index = None
+        self.compressed_retriever = None
     
     def build_index(self, documents: List[Document]) -> VectorStoreIndex:
         """
@@ -38,6 +40,18 @@ class QueryEngineBuilder:
             raise ValueError("Cannot build index from empty document list")
         
         self.index = VectorStoreIndex.from_documents(documents)
+        
+        # Compress the vectors once per index for two-stage retrieval
+        self.compressed_retriever = None
+        if self.config.retrieval_mode == "two_stage":
+            self.compressed_retriever = CompressedVectorRetriever(
+                index=self.index,
+                similarity_top_k=self.config.similarity_top_k,
+                candidate_top_k=self.config.candidate_top_k,
+                compressed_dims=self.config.compressed_dims,
+                quantize_int8=self.config.quantize_int8,
+            )
+        
         return self.index
     
     def get_query_engine(self, top_k: Optional[int] = None) -> RetrieverQueryEngine:
@@ -60,10 +74,13 @@ class QueryEngineBuilder:
         similarity_top_k = top_k if top_k is not None else self.config.similarity_top_k
         
         # Create retriever
-        retriever = VectorIndexRetriever(
-            index=self.index,
-            similarity_top_k=similarity_top_k,
-        )
+        if self.compressed_retriever:
+            retriever = self.compressed_retriever.with_top_k(similarity_top_k)
+        else:
+            retriever = VectorIndexRetriever(
+                index=self.index,
+                similarity_top_k=similarity_top_k,
+            )
         
         # Create query engine with postprocessor
         query_engine = RetrieverQueryEngine(
@@ -77,6 +94,30 @@ class QueryEngineBuilder:
         
         return query_engine
     
+    def get_retrieval_stats(self, queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Report bandwidth saved and recall of two-stage retrieval.
+        
+        Args:
+            queries: Sample queries used to measure recall@k against
+                full-precision search. Recall is omitted if not provided.
+            
+        Returns:
+            Dictionary of retrieval statistics
+            
+        Raises:
+            ValueError: If two-stage retrieval is not enabled
+        """
+        if not self.compressed_retriever:
+            raise ValueError("Two-stage retrieval is not enabled for the current index.")
+        
+        stats = self.compressed_retriever.get_stats()
+        if queries:
+            k = self.config.similarity_top_k
+            stats[f"recall@{k}"] = self.compressed_retriever.evaluate_recall(queries, k)
+        
+        return stats
+    
     def get_index(self) -> VectorStoreIndex:
         """Get the current index."""
         return self.index
@@ -3,35 +3,67 @@ Main RAG system orchestrator.
 Coordinates all components to provide a unified RAG interface.
 """
 
-from typing import Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import QueryBundle
 
 from .config import Config
 from .document_processor import DocumentProcessor
 from .embeddings import EmbeddingManager
 from .models import LLMModel
+from .worker_pool import InferenceWorkerPool
 from .query_engine import QueryEngineBuilder
 from .prompts import PromptTemplate
+from .warmup import AnswerStore, TrafficMonitor, WarmupWorker, extract_candidate_questions
 
 
 class RAGSystem:
     """Main RAG system that orchestrates all components."""
     
-    def __init__(self, config: Optional[Config] = None):
+    # Seconds to wait for a stopped warm-up before indexing a new document
+    WARMUP_STOP_TIMEOUT = 30.0
+    
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        llm_model: Optional[LLMModel] = None,
+        inference_pool: Optional[InferenceWorkerPool] = None,
+        traffic_monitor: Optional[TrafficMonitor] = None
+    ):
         """
         Initialize the RAG system.
         
         Args:
             config: Configuration object. If None, uses default config.
+            llm_model: Preloaded LLM model shared with other systems. If None,
+                the system loads its own model (and worker pool if configured).
+            inference_pool: Worker pool shared with other systems. Only used
+                together with llm_model.
+            traffic_monitor: Monitor of user requests shared with other systems
+                using the same model, so warm-up gives way to all of them
         """
         self.config = config or Config.from_env()
         
         # Initialize components
         self.embedding_manager = EmbeddingManager(self.config)
-        self.llm_model = LLMModel(self.config)
         self.document_processor = DocumentProcessor()
         self.query_engine_builder = QueryEngineBuilder(self.config)
         self.prompt_template = PromptTemplate()
+        
+        # Shared models are owned, and shut down, by whoever created them
+        self._owns_model = llm_model is None
+        self.llm_model = llm_model or LLMModel(self.config)
+        self.inference_pool = inference_pool
+        
+        # Optionally serve generation from worker processes sharing the weights
+        if self._owns_model and self.config.num_workers > 0:
+            self.inference_pool = InferenceWorkerPool(self.llm_model, self.config)
+        
+        # Precomputed answers for likely questions on the current document
+        self.answer_store = AnswerStore(self.config.warmup_match_threshold)
+        self.traffic_monitor = traffic_monitor or TrafficMonitor()
+        self.warmup_worker = None
     
     def process_pdf(self, file_content: bytes) -> bool:
         """
@@ -50,9 +82,16 @@ class RAGSystem:
             if not documents:
                 return False
             
+            # Answers precomputed for the previous document no longer apply
+            self._stop_warmup()
+            self.answer_store = AnswerStore(self.config.warmup_match_threshold)
+            
             # Build index
             self.query_engine_builder.build_index(documents)
             
+            if self.config.warmup_enabled:
+                self._start_warmup(documents)
+            
             return True
             
         except Exception as e:
@@ -74,6 +113,110 @@ class RAGSystem:
         """
         return self.query_engine_builder.get_query_engine(top_k=top_k)
     
+    def get_retrieval_stats(self, queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get two-stage retrieval statistics for the indexed documents.
+        
+        Args:
+            queries: Sample queries used to measure recall@k
+            
+        Returns:
+            Dictionary of retrieval statistics
+            
+        Raises:
+            ValueError: If two-stage retrieval is not enabled
+        """
+        return self.query_engine_builder.get_retrieval_stats(queries=queries)
+    
+    def _start_warmup(self, documents):
+        """Precompute answers to the document's likely questions in the background."""
+        questions = extract_candidate_questions(
+            documents, self.config.warmup_max_questions
+        )
+        if not questions:
+            return
+        
+        # Bind the engine now so the worker never queries a later document's index
+        query_engine = self.get_query_engine()
+        self.warmup_worker = WarmupWorker(
+            questions=questions,
+            embed_fn=self._embed_query,
+            answer_fn=partial(self._answer_for_warmup, query_engine),
+            answer_store=self.answer_store,
+            traffic_monitor=self.traffic_monitor,
+            time_budget=self.config.warmup_time_budget,
+            cpu_budget=self.config.warmup_cpu_budget,
+        )
+        self.warmup_worker.start()
+    
+    def _stop_warmup(self):
+        """Stop the background warm-up and wait for it to finish."""
+        if self.warmup_worker:
+            self.warmup_worker.stop()
+            # Stopping aborts any generation in progress, so this is quick
+            self.warmup_worker.join(timeout=self.WARMUP_STOP_TIMEOUT)
+            self.warmup_worker = None
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Compute the query embedding used for retrieval and answer lookup."""
+        return self.embedding_manager.get_embed_model().get_query_embedding(query)
+    
+    def _answer_for_warmup(
+        self,
+        query_engine: RetrieverQueryEngine,
+        question: str,
+        embedding: List[float],
+        should_abort: Callable[[], bool]
+    ) -> Tuple[str, str, float]:
+        """
+        Retrieve context and generate an abortable answer for a warm-up question.
+        
+        Returns:
+            Tuple of (context, answer, CPU seconds spent in pool workers)
+        """
+        context = self._retrieve_context(
+            query_engine, QueryBundle(query_str=question, embedding=embedding)
+        )
+        if not context.strip():
+            return context, "", 0.0
+        answer, worker_cpu = self._generate_answer(context, question, should_abort)
+        return context, answer, worker_cpu
+    
+    def _retrieve_context(
+        self,
+        query_engine: RetrieverQueryEngine,
+        query_bundle: QueryBundle
+    ) -> str:
+        """Retrieve and join the text of the top source nodes for a query."""
+        response = query_engine.query(query_bundle)
+        
+        context = ""
+        top_k = self.config.similarity_top_k
+        for node in response.source_nodes[:top_k]:
+            context += f"{node.text}\n\n"
+        return context
+    
+    def _generate_answer(
+        self,
+        context: str,
+        query: str,
+        should_abort: Optional[Callable[[], bool]] = None
+    ) -> Tuple[str, float]:
+        """
+        Generate an answer to a query from retrieved context.
+        
+        Returns:
+            Tuple of (answer, CPU seconds spent in a pool worker process)
+        """
+        prompt = self.prompt_template.create_prompt(context, query)
+        if self.inference_pool:
+            return self.inference_pool.generate_with_cpu_time(
+                prompt,
+                timeout=self.config.generation_timeout,
+                should_abort=should_abort
+            )
+        return self.llm_model.generate(prompt, should_abort=should_abort), 0.0
+    
     def generate_response(
         self, 
         query_engine: RetrieverQueryEngine, 
@@ -93,26 +236,34 @@ class RAGSystem:
             if not query_engine:
                 return "Error: Query engine is not initialized."
             
-            # Retrieve relevant context
-            response = query_engine.query(query)
-            
-            # Extract context from source nodes
-            context = ""
-            top_k = self.config.similarity_top_k
-            for node in response.source_nodes[:top_k]:
-                context += f"{node.text}\n\n"
-            
-            if not context.strip():
-                return "No relevant information from PDF document"
-            
-            # Create prompt
-            prompt = self.prompt_template.create_prompt(context, query)
-            
-            # Generate response using LLM
-            response_text = self.llm_model.generate(prompt)
+            with self.traffic_monitor.live_request():
+                query_bundle = QueryBundle(query_str=query)
+                
+                # Serve precomputed answers from the warm-up stage
+                if len(self.answer_store):
+                    query_bundle.embedding = self._embed_query(query)
+                    cached = self.answer_store.lookup(query, query_bundle.embedding)
+                    if cached:
+                        return cached.answer
+                
+                # Retrieve relevant context
+                context = self._retrieve_context(query_engine, query_bundle)
+                
+                if not context.strip():
+                    return "No relevant information from PDF document"
+                
+                # Generate response using LLM
+                response_text, _ = self._generate_answer(context, query)
             
             return response_text if response_text else "Unable to generate a response from PDF documents"
             
         except Exception as e:
             print(f"Error generating a response: {str(e)}")
             return f"Error processing your question: {str(e)}"
+    
+    def shutdown(self):
+        """Stop the background warm-up and any worker pool this system owns."""
+        self._stop_warmup()
+        if self.inference_pool and self._owns_model:
+            self.inference_pool.shutdown()
+            self.inference_pool = None
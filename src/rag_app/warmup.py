@@ -0,0 +1,416 @@
+"""
+Background warm-up of likely questions after a document is indexed.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import zip_longest
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from llama_index.core import Document
+
+from .models import GenerationAborted
+
+
+# Section headings that do not make useful questions
+IGNORED_HEADINGS = {
+    "abstract",
+    "acknowledgement",
+    "acknowledgements",
+    "acknowledgment",
+    "acknowledgments",
+    "appendix",
+    "bibliography",
+    "contents",
+    "references",
+    "table of contents",
+}
+
+# Sentence cues that mark a document's key claims
+KEY_SENTENCE_CUES = {
+    "we propose": "What do the authors propose?",
+    "we introduce": "What do the authors introduce?",
+    "we present": "What do the authors present?",
+    "results show": "What do the results show?",
+    "in conclusion": "What does the document conclude?",
+}
+
+SECTION_NUMBER_PATTERN = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[IVX]+\.|[A-Z](?:\.\d+)*\.?)\s+")
+HEADING_WORD_PATTERN = re.compile(r"[^\W\d_](?:[\w'\-]*\w)?")
+DEFINITION_PATTERN = re.compile(
+    r"^(?:The\s+)?([A-Z][\w\-]*(?:\s+[\w\-]+){0,4})\s+(is|are|refers to)\s+(?:a|an|the)\s+"
+)
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Definition subjects that refer back to something instead of naming it
+VAGUE_SUBJECTS = {
+    "a", "an", "here", "it", "that", "there", "these", "this", "those", "what", "which",
+}
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact-match lookup."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def _deduplicate(questions: List[str]) -> List[str]:
+    """Drop repeated questions while keeping document order."""
+    unique = {}
+    for question in questions:
+        unique.setdefault(normalize_question(question), question)
+    return list(unique.values())
+
+
+def _is_acronym_like(word: str) -> bool:
+    """Whether a word is an acronym, a name like HumanEval, or contains digits."""
+    return any(c.isdigit() for c in word) or any(c.isupper() for c in word[1:])
+
+
+def _has_small_capitals(word: str) -> bool:
+    """Whether a word uses small-capital glyphs, as styled labels in PDFs do."""
+    return any("SMALL CAPITAL" in unicodedata.name(c, "") for c in word)
+
+
+def _extract_heading(line: str) -> Optional[str]:
+    """Return the heading text if a line looks like a section heading."""
+    line = line.strip()
+    if not line or len(line) > 60 or line[-1] in ".,;:":
+        return None
+
+    numbered = SECTION_NUMBER_PATTERN.match(line)
+    text = line[numbered.end():] if numbered else line
+    words = text.split()
+    if not 1 <= len(words) <= 8:
+        return None
+    if not all(HEADING_WORD_PATTERN.fullmatch(w) for w in words):
+        return None
+    if any(_has_small_capitals(w) for w in words):
+        return None
+
+    # Headings start with a capital; unnumbered lines must also be title case
+    if not words[0][0].isupper():
+        return None
+    if not numbered and not all(w[0].isupper() for w in words if len(w) > 3):
+        return None
+
+    # Table headers repeat column names and are mostly acronyms or model names
+    if len({w.lower() for w in words}) < len(words):
+        return None
+    if sum(_is_acronym_like(w) for w in words) * 2 >= len(words):
+        return None
+
+    if text.lower() in IGNORED_HEADINGS:
+        return None
+    return text
+
+
+def _heading_lines(documents: List[Document]) -> List[str]:
+    """
+    Return the lines that may hold section headings, in document order.
+
+    Lines before the abstract on the first page are the title and the author
+    and affiliation block, so they are skipped when an abstract is found.
+    """
+    lines = []
+    for page, doc in enumerate(documents):
+        page_lines = doc.text.splitlines()
+        if page == 0:
+            for i, line in enumerate(page_lines):
+                if line.strip().lower() == "abstract":
+                    page_lines = page_lines[i + 1:]
+                    break
+        lines.extend(page_lines)
+    return lines
+
+
+def extract_candidate_questions(
+    documents: List[Document],
+    max_questions: int,
+) -> List[str]:
+    """
+    Create likely questions from section headings and key sentences.
+
+    Args:
+        documents: Parsed Document objects of the indexed PDF, one per page
+        max_questions: Maximum number of questions to return
+
+    Returns:
+        Candidate questions in document order, alternating between heading
+        and sentence questions so neither kind crowds out the other
+    """
+    heading_questions = []
+    sentence_questions = []
+
+    for line in _heading_lines(documents):
+        heading = _extract_heading(line)
+        if heading:
+            heading_questions.append(f"What does the document say about {heading}?")
+
+    for doc in documents:
+        text = " ".join(doc.text.split())
+        for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+            definition = DEFINITION_PATTERN.match(sentence)
+            if definition:
+                subject, verb = definition.group(1), definition.group(2)
+                if not VAGUE_SUBJECTS & set(subject.lower().split()):
+                    verb = "are" if verb == "are" else "is"
+                    sentence_questions.append(f"What {verb} {subject}?")
+                continue
+
+            lowered = sentence.lower()
+            for cue, question in KEY_SENTENCE_CUES.items():
+                if cue in lowered:
+                    sentence_questions.append(question)
+                    break
+
+    # Interleave both kinds; once one runs out the other fills the remaining slots
+    pairs = zip_longest(_deduplicate(heading_questions), _deduplicate(sentence_questions))
+    questions = [q for pair in pairs for q in pair if q is not None]
+    return questions[:max_questions]
+
+
+@dataclass
+class CachedAnswer:
+    """A precomputed answer for a question."""
+
+    question: str
+    embedding: List[float]
+    context: str
+    answer: str
+
+
+class AnswerStore:
+    """Thread-safe store of precomputed answers keyed by question."""
+
+    def __init__(self, match_threshold: float):
+        """
+        Initialize the answer store.
+
+        Args:
+            match_threshold: Minimum cosine similarity between query embeddings
+                for a stored answer to serve a differently worded question
+        """
+        self.match_threshold = match_threshold
+        self._entries: Dict[str, CachedAnswer] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: CachedAnswer):
+        """Store a precomputed answer."""
+        with self._lock:
+            self._entries[normalize_question(entry.question)] = entry
+
+    def lookup(self, question: str, embedding: List[float]) -> Optional[CachedAnswer]:
+        """
+        Find a stored answer matching a question.
+
+        Args:
+            question: User question
+            embedding: Query embedding of the user question
+
+        Returns:
+            Matching CachedAnswer, or None if no stored question matches
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            exact = self._entries.get(normalize_question(question))
+        if exact or not entries:
+            return exact
+
+        stored = np.asarray([e.embedding for e in entries], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        scores = stored @ query / np.maximum(
+            np.linalg.norm(stored, axis=1) * np.linalg.norm(query), 1e-12
+        )
+        best = int(np.argmax(scores))
+        return entries[best] if scores[best] >= self.match_threshold else None
+
+
+class TrafficMonitor:
+    """Tracks in-flight user requests so background work can yield to them."""
+
+    def __init__(self, idle_grace: float = 1.0):
+        """
+        Initialize the traffic monitor.
+
+        Args:
+            idle_grace: Seconds after the last request before traffic is idle
+        """
+        self.idle_grace = idle_grace
+        self._active = 0
+        self._last_request = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def live_request(self):
+        """Mark a user request as in flight for the duration of the block."""
+        with self._condition:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._last_request = time.monotonic()
+                self._condition.notify_all()
+
+    def is_busy(self) -> bool:
+        """Whether any user request is in flight."""
+        return self._active > 0
+
+    def wait_until_idle(self, stop_event: threading.Event, deadline: float) -> bool:
+        """
+        Block until no user request has been active for idle_grace seconds.
+
+        Args:
+            stop_event: Event that aborts the wait when set
+            deadline: time.monotonic() value after which to give up
+
+        Returns:
+            True if traffic is idle, False if stopped or past the deadline
+        """
+        with self._condition:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                if now >= deadline:
+                    return False
+                quiet_for = now - self._last_request
+                if self._active == 0 and quiet_for >= self.idle_grace:
+                    return True
+                wait = self.idle_grace - quiet_for if self._active == 0 else self.idle_grace
+                self._condition.wait(timeout=min(max(wait, 0.05), deadline - now))
+        return False
+
+
+class WarmupWorker:
+    """
+    Precomputes answers for candidate questions in a background thread.
+
+    The worker only starts a question when user traffic is idle, and aborts
+    a generation in progress as soon as a user request arrives or a budget
+    runs out. A question aborted for traffic is retried once it is idle again.
+    """
+
+    def __init__(
+        self,
+        questions: List[str],
+        embed_fn: Callable[[str], List[float]],
+        answer_fn: Callable[[str, List[float], Callable[[], bool]], Tuple[str, str, float]],
+        answer_store: AnswerStore,
+        traffic_monitor: TrafficMonitor,
+        time_budget: float,
+        cpu_budget: float,
+    ):
+        """
+        Initialize the warm-up worker.
+
+        Args:
+            questions: Candidate questions to precompute
+            embed_fn: Returns the query embedding for a question
+            answer_fn: Returns (context, answer, worker CPU seconds) for a
+                question and its embedding. Its third argument is an abort
+                check to pass to generation.
+            answer_store: Store receiving the precomputed answers
+            traffic_monitor: Monitor of live user requests to yield to
+            time_budget: Wall-clock seconds the warm-up may run
+            cpu_budget: CPU seconds the warm-up may consume, counted as this
+                thread's CPU time plus the worker-process CPU time reported
+                for its generations
+        """
+        self.questions = questions
+        self.embed_fn = embed_fn
+        self.answer_fn = answer_fn
+        self.answer_store = answer_store
+        self.traffic_monitor = traffic_monitor
+        self.time_budget = time_budget
+        self.cpu_budget = cpu_budget
+
+        self.completed = 0
+        self.cpu_used = 0.0
+        self.stop_reason: Optional[str] = None
+        self._deadline = 0.0
+        self._cpu_start = 0.0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start warming up in the background."""
+        self._thread.start()
+
+    def stop(self):
+        """Ask the worker to stop after its current question."""
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the worker thread to finish."""
+        self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        """Whether the worker thread is still running."""
+        return self._thread.is_alive()
+
+    def _should_abort(self) -> bool:
+        """
+        Whether a warm-up generation should give way or stop.
+
+        Called from the warm-up thread, so thread_time() is its CPU time. The
+        worker CPU of the generation in progress is only known once it ends.
+        """
+        if self._stop_event.is_set() or self.traffic_monitor.is_busy():
+            return True
+        if time.monotonic() >= self._deadline:
+            return True
+        return self.cpu_used + time.thread_time() - self._cpu_start >= self.cpu_budget
+
+    def _run(self):
+        """Precompute answers until done, stopped or out of budget."""
+        self._deadline = time.monotonic() + self.time_budget
+        questions = deque(self.questions)
+
+        while questions:
+            question = questions[0]
+            if not self.traffic_monitor.wait_until_idle(self._stop_event, self._deadline):
+                self.stop_reason = "stopped" if self._stop_event.is_set() else "time budget"
+                return
+            if self.cpu_used >= self.cpu_budget:
+                self.stop_reason = "cpu budget"
+                return
+
+            self._cpu_start = time.thread_time()
+            worker_cpu = 0.0
+            try:
+                embedding = self.embed_fn(question)
+                context, answer, worker_cpu = self.answer_fn(
+                    question, embedding, self._should_abort
+                )
+                questions.popleft()
+                if context.strip() and answer:
+                    self.answer_store.add(
+                        CachedAnswer(
+                            question=question,
+                            embedding=embedding,
+                            context=context,
+                            answer=answer,
+                        )
+                    )
+                    self.completed += 1
+            except GenerationAborted as e:
+                # A user request arrived or a budget ran out; retry this question
+                # once traffic is idle, unless the budget checks above end the run
+                worker_cpu = e.cpu_time
+                continue
+            except Exception as e:
+                questions.popleft()
+                print(f"Error warming up question '{question}': {str(e)}")
+            finally:
+                self.cpu_used += time.thread_time() - self._cpu_start + worker_cpu
+
+        self.stop_reason = "done"
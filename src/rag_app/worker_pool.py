@@ -0,0 +1,447 @@
+"""
+Multi-process inference worker pool module.
+"""
+
+import atexit
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import wait
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+import torch
+import torch.multiprocessing as mp
+
+from .config import Config
+from .models import GenerationAborted, LLMModel
+
+
+def _worker_loop(
+    worker_id: int,
+    llm_model: LLMModel,
+    num_threads: int,
+    conn,
+    abort_flags,
+):
+    """
+    Serve generation requests until a shutdown sentinel is received.
+
+    Args:
+        worker_id: Index of this worker in the pool
+        llm_model: Model whose weights live in shared memory
+        num_threads: Torch intra-op thread budget for this worker
+        conn: Pipe end receiving (request_id, prompt) tuples and sending
+            (request_id, response, error, aborted, cpu_time) tuples
+        abort_flags: Shared per-worker flags the parent sets to cancel a request.
+            The parent clears a worker's flag before dispatching to it.
+    """
+    # Keep tokenizer threads from competing with the torch thread budget
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    torch.set_num_threads(num_threads)
+
+    # Give each worker its own sampling seed, even if RNG state was inherited
+    torch.manual_seed(torch.initial_seed() + worker_id + 1)
+
+    with torch.inference_mode():
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+
+            request_id, prompt = request
+            # The process serves one request at a time, so its CPU time is the request's
+            cpu_start = time.process_time()
+            try:
+                response_text = llm_model.generate(
+                    prompt, should_abort=lambda: abort_flags[worker_id] != 0
+                )
+                result = (response_text, None, False)
+            except GenerationAborted:
+                result = (None, None, True)
+            except Exception as e:
+                result = (None, str(e), False)
+            conn.send((request_id, *result, time.process_time() - cpu_start))
+
+
+class InferenceWorkerPool:
+    """Serves LLMModel generation from worker processes sharing one set of weights."""
+
+    # Seconds the collector waits before re-checking for shutdown
+    POLL_INTERVAL = 1.0
+
+    # Seconds between should_abort checks while waiting on a request
+    ABORT_POLL_INTERVAL = 0.1
+
+    # Seconds before restarting a crashed worker, doubled per consecutive crash
+    RESTART_BACKOFF = 1.0
+    MAX_RESTART_BACKOFF = 30.0
+
+    # Consecutive crashes after which a worker slot is no longer restarted
+    MAX_CONSECUTIVE_CRASHES = 5
+
+    def __init__(self, llm_model: LLMModel, config: Config):
+        """
+        Start the worker processes.
+
+        The model is loaded once by the caller. Its weights are moved to shared
+        memory and handed to the workers as shared-memory handles, so every
+        worker maps the same pages instead of loading its own copy. Each worker
+        has its own pipe, so a crashed worker cannot leave a lock held that the
+        others need.
+
+        Args:
+            llm_model: Loaded LLM model to share with the workers
+            config: Configuration object with worker pool settings
+
+        Raises:
+            ValueError: If the pool is misconfigured or the model is not on CPU
+        """
+        if config.num_workers < 1:
+            raise ValueError("Worker pool requires num_workers >= 1")
+        if config.device_map:
+            raise ValueError("Worker pool only supports CPU inference (unset device_map)")
+
+        self.config = config
+        self.llm_model = llm_model
+        self.num_workers = config.num_workers
+        self.num_threads = config.worker_threads or max(
+            1, (os.cpu_count() or 1) // self.num_workers
+        )
+
+        self._futures: Dict[int, Future] = {}
+        self._pending: Deque[Tuple[int, str]] = deque()
+        self._assignments: Dict[int, int] = {}  # worker_id -> running request_id
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._closed = False
+
+        # Crash bookkeeping, only touched by the collector thread except _retired
+        self._crash_counts = [0] * self.num_workers
+        self._restart_at: Dict[int, float] = {}  # worker_id -> monotonic time
+        self._retired: Set[int] = set()
+
+        self.llm_model.model.eval()
+        self.llm_model.model.share_memory()
+
+        self._context = mp.get_context(config.worker_start_method)
+        self._abort_flags = self._context.Array("b", self.num_workers, lock=False)
+        self._workers = [None] * self.num_workers
+        self._conns = [None] * self.num_workers
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        atexit.register(self.shutdown)
+
+    def _start_worker(self, worker_id: int):
+        """Start the worker process and pipe for a pool slot."""
+        parent_conn, child_conn = self._context.Pipe()
+        worker = self._context.Process(
+            target=_worker_loop,
+            args=(
+                worker_id,
+                self.llm_model,
+                self.num_threads,
+                child_conn,
+                self._abort_flags,
+            ),
+            daemon=True,
+        )
+        worker.start()
+        child_conn.close()
+        self._workers[worker_id] = worker
+        self._conns[worker_id] = parent_conn
+
+    def _dispatch(self):
+        """Hand pending requests to idle workers. Caller must hold the lock."""
+        for worker_id, conn in enumerate(self._conns):
+            if not self._pending:
+                break
+            if worker_id in self._assignments or not self._workers[worker_id].is_alive():
+                continue
+
+            request_id, prompt = self._pending.popleft()
+            # Clear the flag before the request is visible to cancel(); clearing it
+            # in the worker could erase a cancel that arrived during startup
+            self._abort_flags[worker_id] = 0
+            self._assignments[worker_id] = request_id
+            try:
+                conn.send((request_id, prompt))
+            except (BrokenPipeError, OSError):
+                # The worker died after the liveness check. Requeue the request for
+                # another worker; the collector handles the crash.
+                del self._assignments[worker_id]
+                self._pending.appendleft((request_id, prompt))
+
+    def _resolve(
+        self,
+        request_id: int,
+        response_text: Optional[str],
+        error: Optional[str],
+        aborted: bool = False,
+        cpu_time: float = 0.0,
+    ):
+        """Complete the future of a request unless its caller has given up on it."""
+        with self._lock:
+            future = self._futures.pop(request_id, None)
+        if future is None:
+            return
+        if aborted:
+            future.set_exception(GenerationAborted(cpu_time=cpu_time))
+        elif error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result((response_text, cpu_time))
+
+    def _handle_crash(self, worker_id: int):
+        """Fail the request held by a crashed worker and schedule its restart."""
+        worker = self._workers[worker_id]
+        if worker.is_alive():
+            # Its pipe broke while the process lives on; do not leave it running
+            worker.terminate()
+        worker.join(timeout=1.0)
+        self._conns[worker_id].close()
+        with self._lock:
+            request_id = self._assignments.pop(worker_id, None)
+        if request_id is not None:
+            self._resolve(
+                request_id,
+                None,
+                f"Inference worker {worker_id} exited with code {worker.exitcode}",
+            )
+        self._schedule_restart(worker_id, f"exit code {worker.exitcode}")
+
+    def _schedule_restart(self, worker_id: int, reason: str):
+        """Restart a worker slot after a backoff, or retire it after repeated crashes."""
+        self._crash_counts[worker_id] += 1
+        crashes = self._crash_counts[worker_id]
+        if crashes > self.MAX_CONSECUTIVE_CRASHES:
+            print(
+                f"Inference worker {worker_id} failed {crashes} times in a row "
+                f"({reason}); not restarting it"
+            )
+            with self._lock:
+                self._retired.add(worker_id)
+                if len(self._retired) < self.num_workers:
+                    return
+                # No worker is left to serve queued requests
+                stranded = [self._futures.pop(r, None) for r, _ in self._pending]
+                self._pending.clear()
+            for future in stranded:
+                if future is not None:
+                    future.set_exception(RuntimeError("All inference workers have failed"))
+            return
+
+        delay = min(self.RESTART_BACKOFF * 2 ** (crashes - 1), self.MAX_RESTART_BACKOFF)
+        print(f"Restarting inference worker {worker_id} in {delay:g}s ({reason})")
+        self._restart_at[worker_id] = time.monotonic() + delay
+
+    def _restart_due_workers(self):
+        """Start the worker slots whose restart backoff has elapsed."""
+        now = time.monotonic()
+        for worker_id, restart_at in list(self._restart_at.items()):
+            if restart_at > now:
+                continue
+            del self._restart_at[worker_id]
+            try:
+                with self._lock:
+                    self._start_worker(worker_id)
+                    self._dispatch()
+            except Exception as e:
+                self._schedule_restart(worker_id, f"start failed: {str(e)}")
+
+    def _collect_results(self):
+        """Resolve futures as workers return results and restart crashed workers."""
+        while not self._closed:
+            self._restart_due_workers()
+            running = [
+                i for i in range(self.num_workers)
+                if i not in self._restart_at and i not in self._retired
+            ]
+            conn_ids = {self._conns[i]: i for i in running}
+            sentinel_ids = {self._workers[i].sentinel: i for i in running}
+
+            timeout = self.POLL_INTERVAL
+            if self._restart_at:
+                next_restart = min(self._restart_at.values()) - time.monotonic()
+                timeout = min(timeout, max(next_restart, 0.0))
+            ready = wait(list(conn_ids) + list(sentinel_ids), timeout=timeout)
+            if self._closed:
+                break
+
+            crashed = set()
+            for obj in ready:
+                if obj in sentinel_ids:
+                    crashed.add(sentinel_ids[obj])
+                    continue
+
+                worker_id = conn_ids[obj]
+                try:
+                    request_id, response_text, error, aborted, cpu_time = obj.recv()
+                except (EOFError, OSError):
+                    crashed.add(worker_id)
+                    continue
+
+                self._crash_counts[worker_id] = 0
+                with self._lock:
+                    self._assignments.pop(worker_id, None)
+                    self._dispatch()
+                self._resolve(request_id, response_text, error, aborted, cpu_time)
+
+            for worker_id in crashed:
+                self._handle_crash(worker_id)
+
+    def _enqueue(self, prompt: str) -> Tuple[int, Future]:
+        """Queue a prompt and return its request id and future."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Worker pool has been shut down")
+            if len(self._retired) == self.num_workers:
+                raise RuntimeError("All inference workers have failed")
+            request_id = next(self._request_ids)
+            self._futures[request_id] = future
+            self._pending.append((request_id, prompt))
+            self._dispatch()
+        return request_id, future
+
+    def submit(self, prompt: str) -> Future:
+        """
+        Queue a prompt for generation.
+
+        Args:
+            prompt: Input prompt text
+
+        Returns:
+            Future resolving to (generated text, worker CPU seconds)
+
+        Raises:
+            RuntimeError: If the pool has been shut down or all workers have failed
+        """
+        return self._enqueue(prompt)[1]
+
+    def cancel(self, request_id: int):
+        """
+        Cancel a request, stopping its generation if a worker is running it.
+
+        Its future fails with GenerationAborted. A running request fails once
+        its worker has stopped, so the exception carries the CPU time spent.
+
+        Args:
+            request_id: Id of the request to cancel
+        """
+        future = None
+        with self._lock:
+            running = False
+            for worker_id, assigned_id in self._assignments.items():
+                if assigned_id == request_id:
+                    self._abort_flags[worker_id] = 1
+                    running = True
+            if not running:
+                future = self._futures.pop(request_id, None)
+                self._pending = deque(r for r in self._pending if r[0] != request_id)
+        if future is not None:
+            future.set_exception(GenerationAborted())
+
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> str:
+        """
+        Generate text from a prompt on a worker process.
+
+        Args:
+            prompt: Input prompt text
+            timeout: Seconds to wait for a result. None waits indefinitely.
+            should_abort: Optional check, polled while waiting, that cancels
+                the request when it returns True
+
+        Returns:
+            Generated text response
+
+        Raises:
+            TimeoutError: If no result arrives within the timeout
+            GenerationAborted: If should_abort cancelled the request
+            RuntimeError: If generation failed or its worker crashed
+        """
+        return self.generate_with_cpu_time(prompt, timeout, should_abort)[0]
+
+    def generate_with_cpu_time(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[str, float]:
+        """
+        Generate text and report the CPU time its worker process spent on it.
+
+        Args:
+            prompt: Input prompt text
+            timeout: Seconds to wait for a result. None waits indefinitely.
+            should_abort: Optional check, polled while waiting, that cancels
+                the request when it returns True
+
+        Returns:
+            Tuple of (generated text, worker CPU seconds)
+
+        Raises:
+            TimeoutError: If no result arrives within the timeout
+            GenerationAborted: If should_abort cancelled the request
+            RuntimeError: If generation failed or its worker crashed
+        """
+        request_id, future = self._enqueue(prompt)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_for = self.ABORT_POLL_INTERVAL if should_abort else None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0.0)
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+            try:
+                return future.result(timeout=wait_for)
+            except FutureTimeoutError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.cancel(request_id)
+                    raise TimeoutError(f"Generation did not finish within {timeout} seconds")
+                if should_abort and should_abort():
+                    self.cancel(request_id)
+                    return future.result()
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        Stop the worker processes and fail any requests still pending.
+
+        Args:
+            timeout: Seconds to wait for each worker to exit
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._collector.join(timeout)
+
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        for conn in self._conns:
+            conn.close()
+
+        with self._lock:
+            pending, self._futures = self._futures, {}
+            self._pending.clear()
+        for future in pending.values():
+            future.set_exception(RuntimeError("Worker pool has been shut down"))